@@ -0,0 +1,32 @@
+# cython: boundscheck=False, wraparound=False, language_level=3
+"""
+Compiled pair-counting kernel for WeightedUndirectedGraph (optional)
+Build in place with: python setup.py build_ext --inplace
+"""
+from cpython.dict cimport PyDict_GetItem, PyDict_SetItem
+from cpython.object cimport PyObject
+
+
+def count_pairs(list ids, counts):
+    """
+    Count every unordered product pair of a single transaction
+    :param ids: Unique item IDs of the transaction (in any order)
+    :param counts: Dict or Counter of {(min_id, max_id): co_purchase_count, ...}, updated in place
+    """
+    cdef Py_ssize_t i, j, n = len(ids)
+    cdef long a, b
+    cdef PyObject *value
+
+    # A `dict counts` argument would reject Counter (Cython checks the exact type), but the PyDict_* calls
+    # below accept any dict subclass and fail with SystemError on anything else, so check explicitly
+    if not isinstance(counts, dict):
+        raise TypeError(f"counts must be a dict or Counter, not {type(counts).__name__}")
+
+    for i in range(n):
+        a = ids[i]
+        for j in range(i + 1, n):
+            b = ids[j]
+            # Canonical (min_id, max_id) order with one compare, so the transaction needs no sorting
+            key = (a, b) if a < b else (b, a)
+            value = PyDict_GetItem(counts, key)
+            PyDict_SetItem(counts, key, 1 if value is NULL else <object>value + 1)
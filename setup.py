@@ -0,0 +1,8 @@
+from setuptools import setup
+from Cython.Build import cythonize
+
+# Builds the optional _pairs extension used by task2.py: python setup.py build_ext --inplace
+setup(
+    name='task2-pairs',
+    ext_modules=cythonize('_pairs.pyx'),
+)
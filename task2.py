@@ -1,11 +1,33 @@
 import csv
+import heapq
 import json
 import logging
 from collections import defaultdict, Counter
-from typing import Dict, List, Tuple, Set
+from itertools import chain, combinations
+from typing import Dict, Iterable, List, Tuple, Set
 import matplotlib.pyplot as plt
 import networkx as nx
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional: only the pandas loader and the sparse matrix need it
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:  # pandas is optional: data loading falls back to the csv module
+    pd = None
+
+try:
+    import scipy.sparse as sp
+except ImportError:  # scipy is optional: neighbor queries fall back to the adjacency list
+    sp = None
+
+try:
+    from _pairs import count_pairs
+except ImportError:  # the Cython kernel is optional (python setup.py build_ext --inplace): fall back to Counter.update
+    count_pairs = None
+
 # ====================== 1. Configuration and Logging Setup ======================
 # Configure logging to record user operations and algorithm runtime status
 logging.basicConfig(
@@ -28,13 +50,32 @@ class WeightedUndirectedGraph:
     - Edge weights: Co-purchase frequency (count)
     """
 
+    # Shared read-only default for dict.get() lookups
+    _EMPTY: Dict[str, int] = {}
+
     def __init__(self):
-        # Adjacency list: {productA: {productB: co_purchase_count, productC: co_purchase_count}, ...}
-        self.adjacency_list: Dict[str, Dict[str, int]] = defaultdict(dict)
+        # Product name <-> integer ID interning (IDs are assigned in order of first appearance)
+        self._item_id: Dict[str, int] = {}
+        self._id_item: List[str] = []
+        # Co-purchase counts, stored once per unordered pair: {(min_id, max_id): co_purchase_count, ...}
+        self.pair_counts: Counter = Counter()
+        # Adjacency list view (canonical direction only) and its reverse index,
+        # rebuilt lazily from pair_counts on first query after an update
+        self._adjacency: Dict[str, Dict[str, int]] = {}
+        self._incoming: Dict[str, List[str]] = {}
+        self._adjacency_dirty: bool = False
+        # Symmetric CSR co-purchase matrix indexed by item ID (requires scipy), rebuilt lazily like the adjacency list
+        self._matrix = None
+        # Visualization layouts keyed by the displayed product tuple: {key: {product: position array}} (see layout_for)
+        self._pos_cache: Dict[Tuple[str, ...], Dict[str, 'np.ndarray']] = {}
         # Total purchase frequency statistics for each product
         self.product_frequency: Counter = Counter()
         # Product categories (for filtering functionality)
         self.product_categories: Dict[str, str] = self._init_product_categories()
+        # Inverted category index: {category: {product: None, ...}} (dict keys keep catalogue order with O(1) lookups)
+        self._category_index: Dict[str, Dict[str, None]] = {}
+        for product, category in self.product_categories.items():
+            self._category_index.setdefault(category, {})[product] = None
 
     def _init_product_categories(self) -> Dict[str, str]:
         """Initialize product categories (manually labeled core products to support filtering)"""
@@ -77,79 +118,193 @@ class WeightedUndirectedGraph:
         }
         return categories
 
+    def _intern(self, item: str) -> int:
+        """Return the integer ID of a product, assigning a new one on first appearance"""
+        item_id = self._item_id.get(item)
+        if item_id is None:
+            item_id = len(self._id_item)
+            self._item_id[item] = item_id
+            self._id_item.append(item)
+        return item_id
+
+    def _invalidate_views(self) -> None:
+        """Mark every structure derived from pair_counts as stale after an update"""
+        self._adjacency_dirty = True
+        self._matrix = None
+        self._pos_cache.clear()
+
+    @property
+    def adjacency_list(self) -> Dict[str, Dict[str, int]]:
+        """
+        Adjacency list view: {productA: {productB: co_purchase_count, productC: co_purchase_count}, ...}
+        Each edge is stored once, under the product with the smaller ID; use _neighbors() for the full
+        neighbor set of a product. Rebuilt from pair_counts with a single scan the first time it is read after an update
+        """
+        if self._adjacency_dirty:
+            # Plain dicts, grown with setdefault only here
+            adjacency: Dict[str, Dict[str, int]] = {}
+            # Reverse index: {productB: [productA, ...]} for every edge stored as adjacency[productA][productB]
+            incoming: Dict[str, List[str]] = {}
+            id_item = self._id_item
+            for (id1, id2), count in self.pair_counts.items():
+                item1, item2 = id_item[id1], id_item[id2]
+                adjacency.setdefault(item1, {})[item2] = count
+                incoming.setdefault(item2, []).append(item1)
+            self._adjacency = adjacency
+            self._incoming = incoming
+            self._adjacency_dirty = False
+        return self._adjacency
+
+    def _neighbors(self, product: str) -> Dict[str, int]:
+        """
+        Synthesize the full neighbor view of a product from the canonical adjacency list and the reverse index
+        :param product: Product name
+        :return: {neighbor: co_purchase_count, ...} (empty if the product has no co-purchase records)
+        """
+        adjacency = self.adjacency_list
+        neighbors = dict(adjacency.get(product, self._EMPTY))
+        for source in self._incoming.get(product, ()):
+            neighbors[source] = adjacency[source][product]
+        return neighbors
+
+    def _co_purchase_matrix(self):
+        """
+        Symmetric CSR matrix of co-purchase counts (row/column = item ID), built from pair_counts on first use after an update
+        :return: scipy.sparse.csr_matrix of shape (n_items, n_items) with int32 indices and data
+        """
+        if self._matrix is None:
+            n_pairs = len(self.pair_counts)
+            n_items = len(self._id_item)
+            rows = np.fromiter((id1 for id1, _ in self.pair_counts), dtype=np.int32, count=n_pairs)
+            cols = np.fromiter((id2 for _, id2 in self.pair_counts), dtype=np.int32, count=n_pairs)
+            counts = np.fromiter(self.pair_counts.values(), dtype=np.int32, count=n_pairs)
+            upper = sp.coo_matrix((counts, (rows, cols)), shape=(n_items, n_items))
+            self._matrix = (upper + upper.T).tocsr()
+        return self._matrix
+
     def add_transaction(self, items: List[str]) -> None:
         """
         Add a new transaction and update the graph structure
         :param items: List of products in a single transaction (after deduplication)
         """
+        # 1. Update total product purchase frequency
+        self.product_frequency.update(items)
+
         if len(items) < 2:
             # Single-product transaction: only update product purchase frequency, no co-purchase relationships
-            for item in items:
-                self.product_frequency[item] += 1
-            logger.info(f"Single-product transaction, only updating product frequency: {items}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Single-product transaction, only updating product frequency: %s", items)
             return
 
-        # 1. Update total product purchase frequency
-        for item in items:
-            self.product_frequency[item] += 1
-
         # 2. Generate all unordered product pairs and update co-purchase counts
-        sorted_items = sorted(items)  # Sort to ensure unordered product pairs (A,B and B,A are treated as the same)
-        for i in range(len(sorted_items)):
-            item1 = sorted_items[i]
-            for j in range(i + 1, len(sorted_items)):
-                item2 = sorted_items[j]
-                # Update adjacency edge for item1
-                if item2 in self.adjacency_list[item1]:
-                    self.adjacency_list[item1][item2] += 1
-                else:
-                    self.adjacency_list[item1][item2] = 1
-                # Update adjacency edge for item2 (undirected graph symmetry)
-                if item1 in self.adjacency_list[item2]:
-                    self.adjacency_list[item2][item1] += 1
-                else:
-                    self.adjacency_list[item2][item1] = 1
-
-        logger.info(f"Processed transaction, updated co-purchase relationships: {items}")
+        ids = list({self._intern(item) for item in items})
+        if count_pairs is not None:
+            # The compiled kernel orders each pair itself, so A,B and B,A are treated as the same pair
+            count_pairs(ids, self.pair_counts)
+        else:
+            # Sorted IDs make every pair come out as (min_id, max_id), so A,B and B,A are treated as the same pair
+            self.pair_counts.update(combinations(sorted(ids), 2))
+        self._invalidate_views()
+
+        # Log per-transaction details only when DEBUG is enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Processed transaction, updated co-purchase relationships: %s", items)
+
+    def add_transactions(self, transactions: Iterable[List[str]]) -> None:
+        """
+        Add a batch of transactions in one pass (used to build the graph from the whole dataset)
+        :param transactions: Iterable of product lists, one per transaction (after deduplication)
+        """
+        transactions = list(transactions)
+
+        # 1. Update total product purchase frequency with a single Counter.update call
+        self.product_frequency.update(chain.from_iterable(transactions))
+
+        # 2. Enumerate the product pairs of every transaction and count them
+        # Single-product transactions are skipped (as in add_transaction) so both paths assign the same item IDs
+        intern = self._intern
+        id_lists = [list({intern(item) for item in items}) for items in transactions if len(items) >= 2]
+        if count_pairs is not None:
+            for ids in id_lists:
+                count_pairs(ids, self.pair_counts)
+        else:
+            # Sorted IDs make combinations() emit canonical (min_id, max_id) pairs
+            self.pair_counts.update(chain.from_iterable(combinations(sorted(ids), 2) for ids in id_lists))
+        self._invalidate_views()
+
+        logger.info(f"Processed {len(transactions)} transactions, updated co-purchase relationships")
 
     def get_top_co_purchase(self, target_product: str, top_n: int = 5) -> List[Tuple[str, int]]:
         """
         Query the TopN products most frequently co-purchased with the target product
         :param target_product: Name of the target product
         :param top_n: Number of results to return
-        :return: [(product_name, co_purchase_count), ...] (sorted descending by count)
+        :return: [(product_name, co_purchase_count), ...] (sorted descending by count, ties by first appearance)
         """
-        if target_product not in self.adjacency_list:
+        if sp is not None:
+            return self._get_top_co_purchase_sparse(target_product, top_n)
+
+        neighbors = self._neighbors(target_product)
+        if not neighbors:
             logger.warning(f"No co-purchase records found for product: {target_product}")
             return []
 
-        # Sort by co-purchase count in descending order
-        co_purchase_items = sorted(
-            self.adjacency_list[target_product].items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
-        return co_purchase_items[:top_n]
+        # Select the TopN by co-purchase count in descending order (ties by smaller ID, as in the sparse path)
+        item_id = self._item_id
+        return heapq.nlargest(top_n, neighbors.items(), key=lambda x: (x[1], -item_id[x[0]]))
+
+    def _get_top_co_purchase_sparse(self, target_product: str, top_n: int) -> List[Tuple[str, int]]:
+        """
+        get_top_co_purchase on the CSR matrix: slice the target's row and select the top N with a partition
+        :param target_product: Name of the target product
+        :param top_n: Number of results to return
+        :return: [(product_name, co_purchase_count), ...] (sorted descending by count, ties by first appearance)
+        """
+        target_id = self._item_id.get(target_product)
+        matrix = self._co_purchase_matrix() if target_id is not None else None
+        if matrix is None or matrix.indptr[target_id] == matrix.indptr[target_id + 1]:
+            logger.warning(f"No co-purchase records found for product: {target_product}")
+            return []
+        if top_n <= 0:
+            return []
+
+        start, end = matrix.indptr[target_id], matrix.indptr[target_id + 1]
+        cols = matrix.indices[start:end]
+        counts = matrix.data[start:end]
+
+        # O(row length) selection of the Nth largest count; every entry tied with it is kept,
+        # so the ID tie-break below decides which of them make the cut
+        if top_n < len(counts):
+            kth = np.partition(counts, len(counts) - top_n)[len(counts) - top_n]
+            selected = counts >= kth
+            cols, counts = cols[selected], counts[selected]
+        order = np.lexsort((cols, -counts))[:top_n]
+
+        id_item = self._id_item
+        return [(id_item[col], count) for col, count in zip(cols[order].tolist(), counts[order].tolist())]
 
     def get_top3_product_pairs(self) -> List[Tuple[Tuple[str, str], int]]:
         """
         Get the Top3 most popular product combinations (product pairs with highest co-purchase counts)
         :return: [( (productA, productB), co_purchase_count ), ...]
         """
-        all_pairs = []
-        processed_pairs = set()  # Avoid duplicate counting (A,B and B,A are treated as the same pair)
+        if not self.pair_counts:
+            return []
 
-        for item1, neighbors in self.adjacency_list.items():
-            for item2, count in neighbors.items():
-                # Ensure product pairs are sorted alphabetically to avoid duplicates
-                pair = tuple(sorted([item1, item2]))
-                if pair not in processed_pairs:
-                    processed_pairs.add(pair)
-                    all_pairs.append((pair, count))
+        # Third-highest co-purchase count
+        threshold = heapq.nlargest(3, self.pair_counts.values())[-1]
 
-        # Sort by co-purchase count in descending order and take top 3
-        all_pairs_sorted = sorted(all_pairs, key=lambda x: x[1], reverse=True)
-        return all_pairs_sorted[:3]
+        def candidates():
+            id_item = self._id_item
+            # pair_counts holds each unordered pair exactly once, so no deduplication is needed
+            for (id1, id2), count in self.pair_counts.items():
+                if count >= threshold:
+                    # Ensure product pairs are sorted alphabetically
+                    item1, item2 = id_item[id1], id_item[id2]
+                    yield ((item1, item2) if item1 < item2 else (item2, item1)), count
+
+        # Top 3 by count among the candidates (ties broken alphabetically)
+        return heapq.nsmallest(3, candidates(), key=lambda x: (-x[1], x[0]))
 
     def check_co_purchase_relation(self, item1: str, item2: str) -> int:
         """
@@ -158,9 +313,11 @@ class WeightedUndirectedGraph:
         :param item2: Second product name
         :return: Co-purchase count
         """
-        if item1 in self.adjacency_list and item2 in self.adjacency_list[item1]:
-            return self.adjacency_list[item1][item2]
-        return 0
+        id1 = self._item_id.get(item1)
+        id2 = self._item_id.get(item2)
+        if id1 is None or id2 is None:
+            return 0
+        return self.pair_counts.get((id1, id2) if id1 < id2 else (id2, id1), 0)
 
     def filter_by_category(self, category: str) -> Dict[str, Dict[str, int]]:
         """
@@ -169,7 +326,7 @@ class WeightedUndirectedGraph:
         :return: Filtered adjacency list
         """
         # First get all products in the specified category
-        category_products = [p for p, cat in self.product_categories.items() if cat == category]
+        category_products = self._category_index.get(category)
         if not category_products:
             logger.warning(f"No products found in category: {category}")
             return {}
@@ -177,14 +334,13 @@ class WeightedUndirectedGraph:
         # Filter adjacency list: only keep edges between products in the category
         filtered_adj = {}
         for product in category_products:
-            if product in self.adjacency_list:
-                filtered_neighbors = {
-                    neighbor: count
-                    for neighbor, count in self.adjacency_list[product].items()
-                    if neighbor in category_products
-                }
-                if filtered_neighbors:
-                    filtered_adj[product] = filtered_neighbors
+            filtered_neighbors = {
+                neighbor: count
+                for neighbor, count in self._neighbors(product).items()
+                if neighbor in category_products
+            }
+            if filtered_neighbors:
+                filtered_adj[product] = filtered_neighbors
 
         return filtered_adj
 
@@ -196,18 +352,33 @@ class WeightedUndirectedGraph:
         :return: [(recommended_product, total_co_purchase_count), ...]
         """
         recommendation_scores = Counter()
+        input_set = set(input_products)
 
+        # Aggregate all co-purchased products and their counts with one Counter.update per input product
         for product in input_products:
-            if product in self.adjacency_list:
-                # Aggregate all co-purchased products and their counts for this product
-                for neighbor, count in self.adjacency_list[product].items():
-                    # Exclude input products themselves
-                    if neighbor not in input_products:
-                        recommendation_scores[neighbor] += count
+            recommendation_scores.update(self._neighbors(product))
+
+        # Exclude input products themselves (once per distinct product)
+        for product in input_set:
+            recommendation_scores.pop(product, None)
 
         # Sort by total score in descending order and take top N
         return recommendation_scores.most_common(top_n)
 
+    def layout_for(self, G: nx.Graph, key: Tuple[str, ...]) -> Dict[str, 'np.ndarray']:
+        """
+        Spring layout positions for a subgraph of this graph, cached until the co-purchase counts change
+        :param G: Subgraph to lay out
+        :param key: Cache key identifying the subgraph (e.g. the tuple of displayed products)
+        :return: {product: position array}
+        """
+        pos = self._pos_cache.get(key)
+        if pos is None:
+            # Spring layout is O(iterations * N^2); a fixed seed also makes recomputed layouts reproducible
+            pos = nx.spring_layout(G, k=2, iterations=50, seed=0)
+            self._pos_cache[key] = pos
+        return pos
+
 
 # ====================== 3. Data Loading Module ======================
 def load_supermarket_data(file_path: str) -> Dict[str, List[str]]:
@@ -216,7 +387,11 @@ def load_supermarket_data(file_path: str) -> Dict[str, List[str]]:
     :param file_path: Path to CSV file
     :return: {transaction_id: [product1, product2, ...], ...}
     """
-    transactions = defaultdict(list)
+    if pd is not None:
+        return _load_supermarket_data_pandas(file_path)
+
+    # Dict values act as insertion-ordered sets of products
+    transactions = defaultdict(dict)
 
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -229,12 +404,56 @@ def load_supermarket_data(file_path: str) -> Dict[str, List[str]]:
 
                 # Define transaction_id: member number + date (same member on same day = 1 transaction)
                 transaction_id = f"{member_id}_{date}"
-                # Add product (deduplicate to avoid repeated products in the same transaction)
-                if item not in transactions[transaction_id]:
-                    transactions[transaction_id].append(item)
+                # Add product (dict keys deduplicate repeated products in the same transaction)
+                transactions[transaction_id][item] = None
+
+        logger.info(f"Successfully loaded data, total transactions: {len(transactions)}")
+        return {transaction_id: list(items) for transaction_id, items in transactions.items()}
+
+    except FileNotFoundError:
+        logger.error(f"File not found: {file_path}")
+        raise
+    except Exception as e:
+        logger.error(f"Failed to load data: {str(e)}")
+        raise
+
+
+def _load_supermarket_data_pandas(file_path: str) -> Dict[str, List[str]]:
+    """
+    pandas implementation of load_supermarket_data: parse and group the CSV in vectorized code
+    :param file_path: Path to CSV file
+    :return: {transaction_id: [product1, product2, ...], ...}
+    """
+    try:
+        # keep_default_na=False reads blank fields as '' (like the csv module) instead of NaN,
+        # which the categorical below would encode as code -1
+        df = pd.read_csv(file_path, keep_default_na=False, dtype=str)
+        if df.empty:
+            logger.info("Successfully loaded data, total transactions: 0")
+            return {}
+
+        # Categorical dtype stores each distinct product name once; rows only keep an integer code
+        items = df['itemDescription'].str.strip().astype('category')
+        df['item_code'] = items.cat.codes
+
+        # Same member on same day = 1 transaction; drop repeated products within a transaction
+        df = df.drop_duplicates(['Member_number', 'Date', 'item_code'])
+        grouped = df.groupby(['Member_number', 'Date'], sort=False)
+
+        # Order rows by transaction and split the decoded product names at transaction boundaries
+        group_ids = grouped.ngroup().to_numpy()
+        order = np.argsort(group_ids, kind='stable')
+        boundaries = np.flatnonzero(np.diff(group_ids[order])) + 1
+        names = np.asarray(items.cat.categories, dtype=object)
+        groups = np.split(names[df['item_code'].to_numpy()[order]], boundaries)
+
+        transactions = {
+            f"{member_id}_{date}": group.tolist()
+            for (member_id, date), group in zip(grouped.size().index, groups)
+        }
 
         logger.info(f"Successfully loaded data, total transactions: {len(transactions)}")
-        return dict(transactions)
+        return transactions
 
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
@@ -264,7 +483,7 @@ def visualize_product_graph(graph: WeightedUndirectedGraph,
         freq = graph.product_frequency[product]
         G.add_node(product, size=freq / 10)  # Scale node size
 
-    # Add edges (thickness proportional to co-purchase count)
+    # Add edges (thickness proportional to co-purchase count); each edge is listed once in the adjacency list
     for product in top_products:
         if product in graph.adjacency_list:
             for neighbor, count in graph.adjacency_list[product].items():
@@ -273,7 +492,7 @@ def visualize_product_graph(graph: WeightedUndirectedGraph,
 
     # 3. Plot configuration
     plt.figure(figsize=(14, 10))
-    pos = nx.spring_layout(G, k=2, iterations=50)  # Layout adjustment
+    pos = graph.layout_for(G, tuple(top_products))  # Layout adjustment (cached per set of displayed products)
 
     # Draw nodes (size related to purchase frequency)
     node_sizes = [G.nodes[node]['size'] for node in G.nodes]
@@ -314,9 +533,8 @@ def main():
         data_path = "Supermarket_dataset_PAI.csv"
         transactions = load_supermarket_data(data_path)
 
-        # Iterate through all transactions to build the graph
-        for trans_id, items in transactions.items():
-            graph.add_transaction(items)
+        # Build the graph from all transactions in a single batch
+        graph.add_transactions(transactions.values())
 
         logger.info("Graph structure built successfully")
     except Exception as e:
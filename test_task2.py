@@ -1,4 +1,11 @@
+import os
+import tempfile
 import unittest
+from collections import Counter
+from itertools import combinations
+from unittest import mock
+
+import task2
 from task2 import WeightedUndirectedGraph  # 确保主文件名为task2.py，否则修改此处
 
 
@@ -31,6 +38,17 @@ class TestSupermarketCoPurchaseAnalysis(unittest.TestCase):
         result_empty = self.graph.get_top_co_purchase("bread")
         self.assertEqual(result_empty, [])
 
+    def test_get_top_co_purchase_ties(self):
+        """测试：共购次数相同时按商品首次出现顺序截断，且与是否安装scipy无关"""
+        full = self.graph.get_top_co_purchase("whole milk", 10)
+        for top_n in range(1, 4):
+            self.assertEqual(self.graph.get_top_co_purchase("whole milk", top_n), full[:top_n])
+        self.assertEqual(self.graph.get_top_co_purchase("whole milk", 1), [("other vegetables", 2)])
+
+        with mock.patch.object(task2, "sp", None):
+            self.assertEqual(self.graph.get_top_co_purchase("whole milk", 10), full)
+            self.assertEqual(self.graph.get_top_co_purchase("whole milk", 1), [("other vegetables", 2)])
+
     def test_get_top3_product_pairs(self):
         """测试：查询Top3热门商品组合"""
         result = self.graph.get_top3_product_pairs()
@@ -74,6 +92,90 @@ class TestSupermarketCoPurchaseAnalysis(unittest.TestCase):
         empty_reco = self.graph.get_recommendation([], 1)
         self.assertEqual(empty_reco, [])
 
+    def test_add_transactions(self):
+        """测试：批量构建与逐笔添加交易结果一致"""
+        batch_graph = WeightedUndirectedGraph()
+        batch_graph.add_transactions(self.test_transactions)
+        self.assertEqual(batch_graph.product_frequency, self.graph.product_frequency)
+        self.assertEqual(batch_graph.pair_counts, self.graph.pair_counts)
+        self.assertEqual(batch_graph.get_top_co_purchase("whole milk", 3),
+                         self.graph.get_top_co_purchase("whole milk", 3))
+
+        # 单商品交易中首次出现的商品不能影响商品ID（共购次数相同时按ID排序）
+        transactions = [["b"], ["a", "c"], ["a", "b"]]
+        batch_graph = WeightedUndirectedGraph()
+        batch_graph.add_transactions(transactions)
+        single_graph = WeightedUndirectedGraph()
+        for trans in transactions:
+            single_graph.add_transaction(trans)
+        self.assertEqual(batch_graph.pair_counts, single_graph.pair_counts)
+        self.assertEqual(batch_graph.get_top_co_purchase("a", 1), [("c", 1)])
+        self.assertEqual(single_graph.get_top_co_purchase("a", 1), [("c", 1)])
+
+
+@unittest.skipUnless(task2.count_pairs, "Cython扩展未构建（python setup.py build_ext --inplace）")
+class TestCountPairsKernel(unittest.TestCase):
+    """Cython共购计数内核单元测试"""
+
+    def test_matches_counter(self):
+        """测试：内核结果与Counter(combinations(sorted(ids), 2))一致，输入无需排序"""
+        transactions = [[3, 1, 2], [2, 0], [5, 4, 3, 1], [7], []]
+        counts = Counter()
+        expected = Counter()
+        for ids in transactions:
+            task2.count_pairs(ids, counts)
+            expected.update(combinations(sorted(ids), 2))
+        self.assertEqual(counts, expected)
+
+        # 普通dict同样可用
+        plain = {}
+        task2.count_pairs([9, 8], plain)
+        self.assertEqual(plain, {(8, 9): 1})
+
+    def test_rejects_non_dict(self):
+        """测试：counts不是dict时抛出TypeError"""
+        with self.assertRaises(TypeError):
+            task2.count_pairs([1, 2], [])
+
+
+class TestLoadSupermarketData(unittest.TestCase):
+    """数据加载模块单元测试（pandas路径与csv回退路径结果一致）"""
+
+    HEADER = "Member_number,Date,itemDescription\n"
+
+    def _load(self, content):
+        """将CSV内容写入临时文件，分别用pandas路径和csv回退路径加载"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "transactions.csv")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            results = [task2.load_supermarket_data(path)]
+            with mock.patch.object(task2, "pd", None):
+                results.append(task2.load_supermarket_data(path))
+        return results
+
+    def test_group_and_deduplicate(self):
+        """测试：按会员+日期分组，并去除同一交易中的重复商品"""
+        content = self.HEADER + ("1,01-01-2015,whole milk\n"
+                                 "1,01-01-2015, yogurt \n"
+                                 "1,01-01-2015,whole milk\n"
+                                 "2,01-01-2015,soda\n")
+        expected = {"1_01-01-2015": ["whole milk", "yogurt"], "2_01-01-2015": ["soda"]}
+        for result in self._load(content):
+            self.assertEqual(result, expected)
+
+    def test_blank_item(self):
+        """测试：空白商品名保留为空字符串，不会被解码成其他商品"""
+        content = self.HEADER + "1,01-01-2015,milk\n1,01-01-2015,\n2,02-01-2015,zzz\n"
+        expected = {"1_01-01-2015": ["milk", ""], "2_02-01-2015": ["zzz"]}
+        for result in self._load(content):
+            self.assertEqual(result, expected)
+
+    def test_empty_file(self):
+        """测试：只有表头的CSV返回空字典"""
+        for result in self._load(self.HEADER):
+            self.assertEqual(result, {})
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
\ No newline at end of file